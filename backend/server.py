@@ -1,17 +1,35 @@
+import os
+
+# Cap BLAS/OpenMP threads before numpy and spaCy are imported, to avoid
+# oversubscription on many-core hosts
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+# Motor sizes its thread pool from this at import time (default 5 x CPU count)
+os.environ.setdefault("MOTOR_MAX_WORKERS", "2")
+
 from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from dotenv import load_dotenv
+from fastapi.middleware.gzip import GZipMiddleware
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
-import os
 import logging
 import re
+import ahocorasick
+import numpy as np
 import spacy
+from spacy.tokens import Span
 import httpx
 import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from pydantic import BaseModel, Field, computed_field, model_validator
+from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
 from enum import Enum
 import uuid
 from datetime import datetime
@@ -23,19 +41,27 @@ import tempfile
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection, created on first database operation
+client: Optional[AsyncIOMotorClient] = None
 
-# Create the main app
-app = FastAPI()
+def get_db():
+    global client
+    if client is None:
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    return client[os.environ['DB_NAME']]
+
+# Create the main app (orjson renders responses in C)
+app = FastAPI(default_response_class=ORJSONResponse)
 api_router = APIRouter(prefix="/api")
 
 # Load spaCy model (with error handling)
 nlp = None
 try:
-    nlp = spacy.load("fr_core_news_lg")
+    # Only the NER component is needed for PER/ORG detection
+    nlp = spacy.load(
+        "fr_core_news_lg",
+        disable=["parser", "tagger", "morphologizer", "lemmatizer", "attribute_ruler"]
+    )
     print("✅ spaCy French model loaded successfully")
 except IOError:
     print("⚠️ spaCy French model not found. NER mode will be disabled.")
@@ -73,8 +99,56 @@ class Entity(BaseModel):
     source: EntitySource
     confidence: float
     replacement: str
-    positions: List[Position]
+    start: int
+    end: int
     selected: bool = True
+    
+    @model_validator(mode="before")
+    @classmethod
+    def _from_positions(cls, data):
+        """Accept the former payload shape, positions=[{start, end}]"""
+        if isinstance(data, dict) and "start" not in data:
+            positions = data.get("positions")
+            first = positions[0] if isinstance(positions, list) and positions else None
+            # Other shapes are left to field validation, which reports missing start/end
+            if isinstance(first, dict) and "start" in first and "end" in first:
+                data = {**data, "start": first["start"], "end": first["end"]}
+        return data
+    
+    @computed_field
+    @property
+    def positions(self) -> List[Position]:
+        """Single-element positions list, kept for API compatibility"""
+        return [Position(start=self.start, end=self.end)]
+
+@dataclass
+class RawEntity:
+    """Unvalidated entity built in extraction hot loops, converted to Entity at the API boundary"""
+    __slots__ = ("text", "type", "source", "confidence", "replacement", "start", "end")
+    text: str
+    type: EntityType
+    source: EntitySource
+    confidence: float
+    replacement: str
+    start: int
+    end: int
+    
+    def to_entity(self) -> Entity:
+        # Fields come from the extractors and are already well-typed, so validation is skipped
+        return Entity.model_construct(
+            id=str(uuid.uuid4()),
+            text=self.text,
+            type=self.type,
+            source=self.source,
+            confidence=self.confidence,
+            replacement=self.replacement,
+            start=self.start,
+            end=self.end,
+            selected=True
+        )
+
+# Entities keyed by (text, start, end), which deduplicates them as they are produced
+EntitySink = Dict[Tuple[str, int, int], RawEntity]
 
 class OllamaConfig(BaseModel):
     url: str = "http://localhost:11434"
@@ -96,7 +170,21 @@ class ProcessingResponse(BaseModel):
     spacy_available: bool
     ollama_available: bool
 
+class BatchProcessingResponse(BaseModel):
+    # Each result's processing_time covers only that document's own work;
+    # the shared NER run is included in the batch processing_time
+    results: List[ProcessingResponse]
+    processing_time: float
+
 # Services
+# Replacement strings, shared by every entity of a type
+REPL_PHONE = "06 XX XX XX XX"
+REPL_EMAIL = "[email.anonymise@exemple.fr]"
+REPL_SIRET = "[SIRET Anonymisé]"
+REPL_SSN = "[N° Sécurité Sociale Anonymisé]"
+REPL_ADDRESS = "[Adresse Anonymisée]"
+REPL_LEGAL = "[Référence Anonymisée]"
+
 class RegexService:
     def __init__(self):
         # French phone patterns
@@ -106,7 +194,7 @@ class RegexService:
         ]
         
         # Email pattern
-        self.email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+        self.email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b'
         
         # SIRET pattern (14 digits)
         self.siret_pattern = r'\b\d{14}\b'
@@ -115,175 +203,365 @@ class RegexService:
         self.ssn_pattern = r'\b[12]\d{12}\b'
         
         # French address patterns
+        self.street_types = ["rue", "avenue", "boulevard", "place", "impasse", "allée", "chemin", "route"]
         self.address_patterns = [
-            r'\b\d+\s+(?:rue|avenue|boulevard|place|impasse|allée|chemin|route)\s+[A-Za-z\s]+\b',
             r'\b\d{5}\s+[A-Z][a-zA-Z\s-]+\b'  # Code postal + ville
         ]
         
-        # Legal references
-        self.legal_patterns = [
-            r'\bRG\s+\d+/\d+\b',
-            r'\bdossier\s+n°?\s*\d+[-/]\d+\b',
-            r'\barticle\s+\d+(?:-\d+)?\b'
+        # Keyword-anchored patterns (street addresses, legal references):
+        # name -> (keywords, context before the keyword, pattern from the keyword).
+        # Casing is spelled out instead of using re.IGNORECASE.
+        street_keywords = self._casings(self.street_types)
+        dossier_keywords = self._casings(["dossier"])
+        article_keywords = self._casings(["article"])
+        self.anchored_patterns = {
+            "street": (
+                street_keywords,
+                r'\b\d+\s+',
+                r'(?:' + '|'.join(street_keywords) + r')\s+[A-Za-z\s]+\b'  # 123 rue de la Paix
+            ),
+            "legal1": (["RG"], '', r'\bRG\s+\d+/\d+\b'),
+            "legal2": (dossier_keywords, '', r'\b(?:' + '|'.join(dossier_keywords) + r')\s+[nN]°?\s*\d+[-/]\d+\b'),
+            "legal3": (article_keywords, '', r'\b(?:' + '|'.join(article_keywords) + r')\s+\d+(?:-\d+)?\b'),
+        }
+
+        # Unanchored patterns combined into named-group alternations. Matches inside
+        # one alternation can't overlap, so email comes before phone (0612345678@orange.fr)
+        # and the postal-code pattern, which runs on into the next token, is scanned
+        # on its own (75008 Paris jean@cabinet.fr)
+        alternations = [
+            [
+                ("email", self.email_pattern),
+                *((f"phone{i}", p) for i, p in enumerate(self.phone_patterns, 1)),
+                ("siret", self.siret_pattern),
+                ("ssn", self.ssn_pattern),
+            ],
+            [(f"address{i}", p) for i, p in enumerate(self.address_patterns, 1)],
         ]
+        # Each alternation is also compiled with ASCII-only classes, faster since \d, \s
+        # and \b skip the Unicode category lookups. It is equivalent on ASCII text except
+        # for the separators \x1c-\x1f, which only the Unicode \s matches.
+        self._compiled = []
+        for patterns in alternations:
+            combined = "|".join(f"(?P<{name}>{pattern})" for name, pattern in patterns)
+            self._compiled.append((re.compile(combined), re.compile(combined, re.ASCII)))
+        self._ascii_unsafe = re.compile(r'[\x1c-\x1f]')
+        
+        # Anchored patterns: keywords are located with an Aho-Corasick automaton,
+        # the regex only runs around each hit
+        self._automaton = ahocorasick.Automaton()
+        self._anchored = {}
+        for name, (keywords, before, pattern) in self.anchored_patterns.items():
+            for keyword in keywords:
+                self._automaton.add_word(keyword, (name, len(keyword)))
+            self._anchored[name] = (
+                re.compile(before + r'\Z') if before else None,
+                re.compile(pattern)
+            )
+        self._automaton.make_automaton()
+        
+        # Group name -> (entity type, replacement)
+        phone_replacement = self._generate_phone_replacement()
+        self._dispatch = {
+            **{f"phone{i}": (EntityType.PHONE, phone_replacement)
+               for i in range(1, len(self.phone_patterns) + 1)},
+            "email": (EntityType.EMAIL, REPL_EMAIL),
+            "siret": (EntityType.SIRET, REPL_SIRET),
+            "ssn": (EntityType.SSN, REPL_SSN),
+            **{f"address{i}": (EntityType.ADDRESS, REPL_ADDRESS)
+               for i in range(1, len(self.address_patterns) + 1)},
+            "street": (EntityType.ADDRESS, REPL_ADDRESS),
+            **{name: (EntityType.LEGAL, REPL_LEGAL)
+               for name in self.anchored_patterns if name.startswith("legal")},
+        }
 
     def luhn_check(self, number: str) -> bool:
         """Validate SIRET using Luhn algorithm"""
-        def luhn_checksum(card_num):
-            def digits_of(n):
-                return [int(d) for d in str(n)]
-            digits = digits_of(card_num)
-            odd_digits = digits[-1::-2]
-            even_digits = digits[-2::-2]
-            checksum = sum(odd_digits)
-            for d in even_digits:
-                checksum += sum(digits_of(d*2))
-            return checksum % 10
-        return luhn_checksum(number) == 0
-
-    def extract_entities(self, text: str) -> List[Entity]:
-        entities = []
+        return bool(self.luhn_mask([number])[0])
+    
+    def luhn_mask(self, numbers: List[str]) -> np.ndarray:
+        """Validate same-length digit strings with the Luhn algorithm in one vectorized pass"""
+        if not numbers:
+            return np.zeros(0, dtype=bool)
         
-        # Phone numbers
-        for pattern in self.phone_patterns:
-            for match in re.finditer(pattern, text):
-                entities.append(Entity(
-                    text=match.group(),
-                    type=EntityType.PHONE,
-                    source=EntitySource.REGEX,
-                    confidence=1.0,
-                    replacement=self._generate_phone_replacement(),
-                    positions=[Position(start=match.start(), end=match.end())]
-                ))
+        width = len(numbers[0])
+        joined = "".join(numbers)
+        if not joined.isascii():
+            # \d also matches non-ASCII decimal digits
+            joined = "".join(str(int(d)) for d in joined)
+        digits = np.frombuffer(joined.encode("ascii"), dtype=np.uint8).reshape(-1, width) - 48
         
-        # Emails
-        for match in re.finditer(self.email_pattern, text):
-            entities.append(Entity(
-                text=match.group(),
-                type=EntityType.EMAIL,
-                source=EntitySource.REGEX,
-                confidence=1.0,
-                replacement="[email.anonymise@exemple.fr]",
-                positions=[Position(start=match.start(), end=match.end())]
-            ))
+        # Double every second digit from the right
+        weights = np.ones(width, dtype=np.uint8)
+        weights[-2::-2] = 2
+        doubled = digits * weights
+        doubled = np.where(doubled >= 10, doubled - 9, doubled)
+        return doubled.sum(axis=1) % 10 == 0
+    
+    def extract_entities(self, text: str) -> List[RawEntity]:
+        sink = {}
+        self.fill(sink, text)
+        return list(sink.values())
+    
+    def _alternations(self, text: str) -> List[re.Pattern]:
+        """Compiled alternations to scan text with, ASCII-only when that gives the same matches"""
+        use_ascii = text.isascii() and not self._ascii_unsafe.search(text)
+        return [compiled_ascii if use_ascii else compiled
+                for compiled, compiled_ascii in self._compiled]
+    
+    def fill(self, sink: EntitySink, text: str):
+        """Add the entities found in text to sink; the first entity for a key wins"""
+        # One pass per alternation, dispatching on the matched group
+        spans = []
+        sirets = []
+        for compiled in self._alternations(text):
+            for match in compiled.finditer(text):
+                if match.lastgroup == "siret":
+                    sirets.append(match)
+                else:
+                    spans.append((match.lastgroup, match.start(), match.end()))
         
-        # SIRET with Luhn validation
-        for match in re.finditer(self.siret_pattern, text):
-            siret = match.group()
-            if self.luhn_check(siret):
-                entities.append(Entity(
-                    text=siret,
-                    type=EntityType.SIRET,
-                    source=EntitySource.REGEX,
-                    confidence=1.0,
-                    replacement="[SIRET Anonymisé]",
-                    positions=[Position(start=match.start(), end=match.end())]
-                ))
+        # SIRET with Luhn validation, all candidates at once
+        valid = self.luhn_mask([match.group() for match in sirets])
+        spans.extend(
+            ("siret", match.start(), match.end())
+            for match, is_valid in zip(sirets, valid) if is_valid
+        )
+        
+        spans.extend(self._find_anchored(text))
         
-        # SSN
-        for match in re.finditer(self.ssn_pattern, text):
-            entities.append(Entity(
-                text=match.group(),
-                type=EntityType.SSN,
+        for name, start, end in spans:
+            entity_type, replacement = self._dispatch[name]
+            match_text = text[start:end]
+            sink.setdefault((match_text, start, end), RawEntity(
+                text=match_text,
+                type=entity_type,
                 source=EntitySource.REGEX,
                 confidence=1.0,
-                replacement="[N° Sécurité Sociale Anonymisé]",
-                positions=[Position(start=match.start(), end=match.end())]
+                replacement=replacement,
+                start=start,
+                end=end
             ))
+    
+    def _find_anchored(self, text: str) -> List[Tuple[str, int, int]]:
+        """Locate keyword-anchored patterns from their Aho-Corasick keyword hits"""
+        spans = []
+        last_end = dict.fromkeys(self._anchored, 0)
+        for keyword_end, (name, length) in self._automaton.iter(text):
+            start = keyword_end - length + 1
+            if start < last_end[name]:
+                continue
+            
+            before, pattern = self._anchored[name]
+            match = pattern.match(text, start)
+            if not match:
+                continue
+            if before:
+                # The context (street number and spacing) is searched back to the previous
+                # character that is neither whitespace nor a digit, however far that is
+                lo = start
+                while lo > last_end[name] and (text[lo - 1].isspace() or text[lo - 1].isdecimal()):
+                    lo -= 1
+                context = before.search(text, lo, start)
+                if not context:
+                    continue
+                start = context.start()
+            
+            spans.append((name, start, match.end()))
+            last_end[name] = match.end()
         
-        # Addresses
-        for pattern in self.address_patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                entities.append(Entity(
-                    text=match.group(),
-                    type=EntityType.ADDRESS,
-                    source=EntitySource.REGEX,
-                    confidence=1.0,
-                    replacement="[Adresse Anonymisée]",
-                    positions=[Position(start=match.start(), end=match.end())]
-                ))
-        
-        # Legal references
-        for pattern in self.legal_patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                entities.append(Entity(
-                    text=match.group(),
-                    type=EntityType.LEGAL,
-                    source=EntitySource.REGEX,
-                    confidence=1.0,
-                    replacement="[Référence Anonymisée]",
-                    positions=[Position(start=match.start(), end=match.end())]
-                ))
-        
-        return entities
+        return spans
+    
+    @staticmethod
+    def _casings(words: List[str]) -> List[str]:
+        """Lowercase, capitalized and uppercase spellings of each word"""
+        return [variant for word in words for variant in (word, word.capitalize(), word.upper())]
     
     def _generate_phone_replacement(self):
-        return "06 XX XX XX XX"
+        return REPL_PHONE
 
 class NERService:
+    batch_size = 32
+    cache_size = 2048
+    # Kept NER labels -> confidence used when the model provides none
+    target_labels = {"PER": 0.9, "ORG": 0.85}
+    
     def __init__(self):
         self.nlp = nlp
         self.person_counter = 1
         self.org_counter = 1
+        # Paragraph digest -> (label, start, end, confidence) spans, relative to the paragraph
+        self._cache: "OrderedDict[bytes, Tuple[Tuple[str, int, int, float], ...]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Extraction may run on several executor threads at once
+        self._counter_lock = threading.Lock()
+        # Detected once rather than with hasattr(ent._, 'confidence') per entity
+        self._has_confidence = Span.has_extension("confidence")
+    
+    def extract_entities(self, text: str) -> List[RawEntity]:
+        sink = {}
+        self.fill(sink, text)
+        return list(sink.values())
     
-    def extract_entities(self, text: str) -> List[Entity]:
+    def fill(self, sink: EntitySink, text: str):
+        """Add the entities found in text to sink; the first entity for a key wins"""
+        self.fill_batch([sink], [text])
+    
+    def fill_batch(self, sinks: List[EntitySink], texts: List[str]):
+        """Fill one sink per text with a single batched spaCy run"""
         if not self.nlp:
-            return []
+            return
         
-        entities = []
-        doc = self.nlp(text)
+        # NER runs per paragraph so recurring paragraphs are served from the cache
+        documents = [
+            [(offset, self._digest(paragraph), paragraph) for offset, paragraph in self._split_paragraphs(text)]
+            for text in texts
+        ]
+        spans = self._paragraph_spans({
+            digest: paragraph for paragraphs in documents for _, digest, paragraph in paragraphs
+        })
+        
+        # Counters are stateful, so replacements are numbered after the merge
+        with self._counter_lock:
+            for sink, text, paragraphs in zip(sinks, texts, documents):
+                self._build_entities(sink, text, [(offset, spans[digest]) for offset, digest, _ in paragraphs])
+    
+    @staticmethod
+    def _idx_to_name(index: int) -> str:
+        """Convert a 1-based counter to a spreadsheet-style name: A..Z, AA..AZ, ..."""
+        name = ""
+        while index > 0:
+            index, remainder = divmod(index - 1, 26)
+            name = chr(65 + remainder) + name
+        return name
+    
+    @staticmethod
+    def _split_paragraphs(text: str):
+        """Yield (offset, paragraph) for each non-blank paragraph"""
+        offset = 0
+        for paragraph in text.split("\n\n"):
+            if paragraph.strip():
+                yield offset, paragraph
+            offset += len(paragraph) + 2
+    
+    @staticmethod
+    def _digest(paragraph: str) -> bytes:
+        return hashlib.blake2b(paragraph.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    
+    def _paragraph_spans(self, paragraphs: Dict[bytes, str]) -> Dict[bytes, Tuple[Tuple[str, int, int, float], ...]]:
+        """Get NER spans for each paragraph, running spaCy only on cache misses"""
+        spans = {}
+        with self._cache_lock:
+            for digest in paragraphs:
+                if digest in self._cache:
+                    self._cache.move_to_end(digest)
+                    spans[digest] = self._cache[digest]
+        
+        misses = [digest for digest in paragraphs if digest not in spans]
+        docs = self.nlp.pipe((paragraphs[digest] for digest in misses), batch_size=self.batch_size)
+        for digest, doc in zip(misses, docs):
+            spans[digest] = self._spans_from_doc(doc)
+        
+        with self._cache_lock:
+            for digest in misses:
+                self._cache[digest] = spans[digest]
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        
+        return spans
+    
+    def _spans_from_doc(self, doc) -> Tuple[Tuple[str, int, int, float], ...]:
+        # Label ID -> (label, default confidence); built-in labels such as ORG are
+        # symbols rather than string hashes, so IDs come from the doc's vocab
+        strings = doc.vocab.strings
+        labels = {strings[label]: (label, confidence) for label, confidence in self.target_labels.items()}
+        has_confidence = self._has_confidence
+        spans = []
         
         for ent in doc.ents:
-            if ent.label_ == "PER":  # Person
-                entities.append(Entity(
-                    text=ent.text,
-                    type=EntityType.PERSON,
-                    source=EntitySource.NER,
-                    confidence=round(ent._.confidence if hasattr(ent._, 'confidence') else 0.9, 2),
-                    replacement=f"Personne {chr(64 + self.person_counter)}",
-                    positions=[Position(start=ent.start_char, end=ent.end_char)]
-                ))
-                self.person_counter += 1
-            
-            elif ent.label_ == "ORG":  # Organization
-                entities.append(Entity(
-                    text=ent.text,
-                    type=EntityType.ORGANIZATION,
-                    source=EntitySource.NER,
-                    confidence=round(ent._.confidence if hasattr(ent._, 'confidence') else 0.85, 2),
-                    replacement=f"Organisation {chr(64 + self.org_counter)}",
-                    positions=[Position(start=ent.start_char, end=ent.end_char)]
-                ))
-                self.org_counter += 1
+            # Other labels are dropped with a single lookup on the integer label
+            target = labels.get(ent.label)
+            if target is None:
+                continue
+            label, default_confidence = target
+            confidence = round(ent._.confidence, 2) if has_confidence else default_confidence
+            spans.append((label, ent.start_char, ent.end_char, confidence))
         
-        return entities
+        return tuple(spans)
+    
+    def _build_entities(self, sink: EntitySink, text: str, paragraph_spans):
+        """Build entities from (paragraph offset, spans) pairs, in document order"""
+        for offset, spans in paragraph_spans:
+            for label, start, end, confidence in spans:
+                start, end = start + offset, end + offset
+                ent_text = text[start:end]
+                if label == "PER":
+                    sink.setdefault((ent_text, start, end), RawEntity(
+                        text=ent_text,
+                        type=EntityType.PERSON,
+                        source=EntitySource.NER,
+                        confidence=confidence,
+                        replacement=f"Personne {self._idx_to_name(self.person_counter)}",
+                        start=start,
+                        end=end
+                    ))
+                    self.person_counter += 1
+                
+                else:
+                    sink.setdefault((ent_text, start, end), RawEntity(
+                        text=ent_text,
+                        type=EntityType.ORGANIZATION,
+                        source=EntitySource.NER,
+                        confidence=confidence,
+                        replacement=f"Organisation {self._idx_to_name(self.org_counter)}",
+                        start=start,
+                        end=end
+                    ))
+                    self.org_counter += 1
 
 class OllamaService:
-    def __init__(self, config: OllamaConfig):
+    # Seconds a successful /api/tags result is reused, so rapid UI polls don't hammer Ollama
+    tags_ttl = 3.0
+    tags_cache_size = 64
+    # Ollama URL -> (fetched at, models), only for reachable servers
+    _tags_cache: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+    
+    def __init__(self, config: OllamaConfig, http: httpx.AsyncClient):
         self.config = config
+        # Shared client, so connections to Ollama are pooled across requests
+        self.http = http
     
-    async def check_availability(self) -> bool:
-        """Test Ollama connection"""
+    async def fetch_tags(self) -> Tuple[bool, List[str]]:
+        """Test Ollama connection and get installed models with a single request"""
+        cached = self._tags_cache.get(self.config.url)
+        if cached and time.monotonic() - cached[0] < self.tags_ttl:
+            return True, cached[1]
+        
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.config.url}/api/tags", timeout=3.0)
-                return response.status_code == 200
+            response = await self.http.get(f"{self.config.url}/api/tags", timeout=5.0)
+            if response.status_code != 200:
+                return False, []
+            data = response.json()
+            models = [model["name"] for model in data.get("models", [])]
         except:
-            return False
+            return False, []
+        
+        self._store_tags(self.config.url, models)
+        return True, models
     
-    async def get_available_models(self) -> List[str]:
-        """Get installed models"""
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.config.url}/api/tags", timeout=5.0)
-                if response.status_code == 200:
-                    data = response.json()
-                    return [model["name"] for model in data.get("models", [])]
-        except:
-            pass
-        return []
+    @classmethod
+    def _store_tags(cls, url: str, models: List[str]):
+        """Cache a successful lookup, dropping expired and least recently stored entries"""
+        cache = cls._tags_cache
+        now = time.monotonic()
+        for expired in [u for u, (fetched_at, _) in cache.items() if now - fetched_at >= cls.tags_ttl]:
+            del cache[expired]
+        cache[url] = (now, models)
+        cache.move_to_end(url)
+        while len(cache) > cls.tags_cache_size:
+            cache.popitem(last=False)
     
-    async def extract_entities(self, text: str) -> List[Entity]:
+    async def extract_entities(self, text: str) -> List[RawEntity]:
         """Extract entities using Ollama (placeholder for now)"""
         # This will be implemented when Ollama is available
         return []
@@ -293,24 +571,54 @@ class DocumentProcessor:
     @staticmethod
     def apply_anonymization(content: str, entities: List[Entity]) -> str:
         """Apply entity replacements to text content"""
-        # Sort by position (start) in descending order to avoid position shifts
+        # Sort by position (start) and rebuild the text in a single forward pass
         sorted_entities = sorted(
             [e for e in entities if e.selected], 
-            key=lambda x: x.positions[0].start, 
-            reverse=True
+            key=lambda x: x.start
         )
         
-        result = content
+        parts = []
+        cursor = 0
         for entity in sorted_entities:
-            pos = entity.positions[0]
-            result = result[:pos.start] + entity.replacement + result[pos.end:]
+            # An entity overlapping an already replaced one extends that replacement,
+            # so no part of it is left in clear text
+            if entity.start < cursor:
+                cursor = max(cursor, entity.end)
+                continue
+            parts.append(content[cursor:entity.start])
+            parts.append(entity.replacement)
+            cursor = entity.end
+        parts.append(content[cursor:])
         
-        return result
+        return "".join(parts)
+    
+    @staticmethod
+    async def iter_buffer(buffer: io.BytesIO, chunk_size: int = 64 * 1024):
+        """Yield the buffer content in fixed-size chunks for streaming"""
+        while chunk := buffer.read(chunk_size):
+            yield chunk
 
 # Initialize services
 regex_service = RegexService()
 ner_service = NERService()
 
+def build_processing_response(request: DocumentRequest, sink: EntitySink, start_time: datetime, elapsed: float = 0.0) -> ProcessingResponse:
+    """Wrap the deduplicated entities of a sink in a ProcessingResponse"""
+    # Only the unique entities are validated
+    unique_entities = [entity.to_entity() for entity in sink.values()]
+    
+    # elapsed is time already spent on this document outside the span since start_time
+    processing_time = elapsed + (datetime.now() - start_time).total_seconds()
+    
+    return ProcessingResponse(
+        entities=unique_entities,
+        processing_time=processing_time,
+        mode_used=request.mode,
+        total_occurrences=len(unique_entities),
+        spacy_available=nlp is not None,
+        ollama_available=False
+    )
+
 # API Endpoints
 @api_router.get("/")
 async def root():
@@ -330,61 +638,76 @@ async def process_document(request: DocumentRequest):
     """Process document with selected mode"""
     start_time = datetime.now()
     
-    all_entities = []
+    sink = {}
+    
+    # CPU-bound extraction runs in the thread pool to keep the event loop responsive
+    loop = asyncio.get_running_loop()
     
     # Always run REGEX
-    regex_entities = regex_service.extract_entities(request.content)
-    all_entities.extend(regex_entities)
+    await loop.run_in_executor(app.state.executor, regex_service.fill, sink, request.content)
     
     # Run NER if Advanced mode and spaCy available
     if request.mode == ProcessingMode.ADVANCED and nlp:
-        ner_entities = ner_service.extract_entities(request.content)
-        all_entities.extend(ner_entities)
+        await loop.run_in_executor(app.state.executor, ner_service.fill, sink, request.content)
     
     # Ollama mode (placeholder for now)
     if request.mode == ProcessingMode.OLLAMA:
         # Will implement when Ollama integration is ready
         pass
     
-    # Remove duplicates based on text and position
-    unique_entities = []
-    seen = set()
-    for entity in all_entities:
-        key = (entity.text, entity.positions[0].start, entity.positions[0].end)
-        if key not in seen:
-            seen.add(key)
-            unique_entities.append(entity)
+    return build_processing_response(request, sink, start_time)
+
+@api_router.post("/process-batch", response_model=BatchProcessingResponse)
+async def process_batch(requests: List[DocumentRequest]):
+    """Process several documents, running NER over them as one spaCy batch"""
+    start_time = datetime.now()
+    loop = asyncio.get_running_loop()
     
-    processing_time = (datetime.now() - start_time).total_seconds()
+    sinks = [{} for _ in requests]
+    regex_times = []
+    for sink, request in zip(sinks, requests):
+        doc_start = datetime.now()
+        await loop.run_in_executor(app.state.executor, regex_service.fill, sink, request.content)
+        regex_times.append((datetime.now() - doc_start).total_seconds())
     
-    return ProcessingResponse(
-        entities=unique_entities,
-        processing_time=processing_time,
-        mode_used=request.mode,
-        total_occurrences=len(unique_entities),
-        spacy_available=nlp is not None,
-        ollama_available=False
+    # Run NER once over every Advanced mode document
+    if nlp:
+        advanced = [i for i, r in enumerate(requests) if r.mode == ProcessingMode.ADVANCED]
+        await loop.run_in_executor(
+            app.state.executor,
+            ner_service.fill_batch,
+            [sinks[i] for i in advanced],
+            [requests[i].content for i in advanced]
+        )
+    
+    results = [
+        build_processing_response(request, sink, datetime.now(), elapsed)
+        for request, sink, elapsed in zip(requests, sinks, regex_times)
+    ]
+    
+    return BatchProcessingResponse(
+        results=results,
+        processing_time=(datetime.now() - start_time).total_seconds()
     )
 
 @api_router.post("/test-ollama")
 async def test_ollama_connection(config: OllamaConfig):
     """Test Ollama connection"""
-    service = OllamaService(config)
-    available = await service.check_availability()
-    models = await service.get_available_models() if available else []
+    service = OllamaService(config, app.state.http)
+    available, models = await service.fetch_tags()
     
     return {
         "connected": available,
         "models": models,
-        "config": config.dict()
+        "config": config.model_dump()
     }
 
 @api_router.get("/ollama-models")
 async def get_ollama_models(url: str = "http://localhost:11434"):
     """Get available Ollama models"""
     config = OllamaConfig(url=url)
-    service = OllamaService(config)
-    models = await service.get_available_models()
+    service = OllamaService(config, app.state.http)
+    _, models = await service.fetch_tags()
     return {"models": models}
 
 @api_router.post("/generate-document")
@@ -407,13 +730,17 @@ async def generate_anonymized_document(
         # Save to memory
         doc_io = io.BytesIO()
         doc.save(doc_io)
+        size = doc_io.tell()
         doc_io.seek(0)
         
         # Return as streaming response
         return StreamingResponse(
-            io.BytesIO(doc_io.getvalue()),
+            DocumentProcessor.iter_buffer(doc_io),
             media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+            headers={
+                "Content-Disposition": f"attachment; filename={filename}",
+                "Content-Length": str(size)
+            }
         )
     
     except Exception as e:
@@ -422,6 +749,27 @@ async def generate_anonymized_document(
 # Include router
 app.include_router(api_router)
 
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that passes the given paths through uncompressed"""
+    
+    def __init__(self, app, excluded_paths=(), **kwargs):
+        super().__init__(app, **kwargs)
+        self.excluded_paths = frozenset(excluded_paths)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Compress responses above 1 KiB for clients that accept gzip. DOCX files are
+# already zip archives, and gzipping them would only drop their Content-Length.
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    minimum_size=1024,
+    excluded_paths=[f"{api_router.prefix}/generate-document"]
+)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -438,6 +786,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_http_client():
+    app.state.http = httpx.AsyncClient(
+        timeout=5.0,
+        limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)
+    )
+
+@app.on_event("startup")
+async def create_executor():
+    # Thread pool for CPU-bound extraction; spaCy releases the GIL in its numeric kernels
+    app.state.executor = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+
+@app.on_event("startup")
+async def warmup_models():
+    """Run the extraction pipeline once so the first request doesn't pay the cold-start cost"""
+    sample = "M. Dupont, 12 rue de la Paix, 75001 Paris, dossier RG 24/12345"
+    regex_service.extract_entities(sample)
+    if nlp:
+        nlp(sample)
+    logger.info("Extraction pipeline warmed up")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    if client is not None:
+        client.close()
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await app.state.http.aclose()
+
+@app.on_event("shutdown")
+async def shutdown_executor():
+    app.state.executor.shutdown(wait=False)
\ No newline at end of file
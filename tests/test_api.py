@@ -0,0 +1,106 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+
+@pytest.fixture
+def client():
+    with TestClient(server.app) as client:
+        yield client
+
+
+def test_process_batch_reports_per_document_times(client):
+    documents = [
+        {"content": "Appeler le 06.12.34.56.78", "filename": "a.txt", "mode": "standard"},
+        {"content": "Dossier RG 24/12345", "filename": "b.txt", "mode": "advanced"},
+    ]
+    response = client.post("/api/process-batch", json=documents)
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert [[e["text"] for e in r["entities"]] for r in data["results"]] == [["06.12.34.56.78"], ["RG 24/12345"]]
+    assert sum(r["processing_time"] for r in data["results"]) <= data["processing_time"]
+
+
+@pytest.fixture
+def ollama(client, monkeypatch):
+    """Route the shared httpx client to a fake Ollama; returns the list of requested URLs"""
+    import httpx
+    
+    calls = []
+    state = {"up": True}
+    
+    def handler(request):
+        calls.append(str(request.url))
+        if not state["up"]:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"models": [{"name": "llama3.2:3b"}]})
+    
+    monkeypatch.setattr(server.OllamaService, "_tags_cache", server.OrderedDict())
+    monkeypatch.setattr(server.app.state, "http", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return calls, state
+
+
+def test_ollama_tags_fetched_once_and_cached(client, ollama):
+    calls, _ = ollama
+    first = client.post("/api/test-ollama", json={"url": "http://ollama:11434"}).json()
+    second = client.get("/api/ollama-models", params={"url": "http://ollama:11434"}).json()
+    assert first["connected"] and first["models"] == ["llama3.2:3b"]
+    assert second == {"models": ["llama3.2:3b"]}
+    assert calls == ["http://ollama:11434/api/tags"]
+
+
+def test_ollama_failures_are_not_cached(client, ollama):
+    calls, state = ollama
+    state["up"] = False
+    assert client.post("/api/test-ollama", json={"url": "http://ollama:11434"}).json()["connected"] is False
+    state["up"] = True
+    assert client.post("/api/test-ollama", json={"url": "http://ollama:11434"}).json()["connected"] is True
+    assert len(calls) == 2
+
+
+def test_ollama_tags_cache_is_bounded(client, ollama, monkeypatch):
+    monkeypatch.setattr(server.OllamaService, "tags_cache_size", 3)
+    for port in range(10):
+        client.get("/api/ollama-models", params={"url": f"http://ollama:{port}"})
+    assert list(server.OllamaService._tags_cache) == [f"http://ollama:{port}" for port in (7, 8, 9)]
+
+
+@pytest.mark.parametrize("positions", [[{}], [[1, 2]]])
+def test_generate_document_rejects_malformed_positions(client, positions):
+    entity = {
+        "text": "06.12.34.56.78",
+        "type": "phone",
+        "source": "REGEX",
+        "confidence": 1.0,
+        "replacement": "06 XX XX XX XX",
+        "positions": positions,
+    }
+    response = client.post("/api/generate-document", params={"original_content": "x"}, json=[entity])
+    assert response.status_code == 422
+
+
+def test_generate_document_is_not_gzipped(client):
+    content = "Appelez le 06.12.34.56.78\n" * 200
+    response = client.post(
+        "/api/generate-document",
+        params={"original_content": content},
+        json=[],
+        headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert int(response.headers["content-length"]) == len(response.content)
+    assert response.content.startswith(b"PK")
+
+
+def test_other_responses_are_still_gzipped(client):
+    content = "Appelez le 06.12.34.56.78\n" * 200
+    response = client.post(
+        "/api/process",
+        json={"content": content, "filename": "note.txt", "mode": "standard"},
+        headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
@@ -0,0 +1,39 @@
+import server
+from server import DocumentProcessor, Entity, EntitySource, EntityType
+
+
+def entity(start, end, replacement, selected=True):
+    return Entity(
+        text="x" * (end - start),
+        type=EntityType.ADDRESS,
+        source=EntitySource.REGEX,
+        confidence=1.0,
+        replacement=replacement,
+        start=start,
+        end=end,
+        selected=selected
+    )
+
+
+def test_replacements_in_any_order():
+    content = "aa BB cc DD ee"
+    entities = [entity(9, 11, "[D]"), entity(3, 5, "[B]")]
+    assert DocumentProcessor.apply_anonymization(content, entities) == "aa [B] cc [D] ee"
+
+
+def test_unselected_entities_are_kept():
+    content = "aa BB cc"
+    assert DocumentProcessor.apply_anonymization(content, [entity(3, 5, "[B]", selected=False)]) == content
+
+
+def test_overlapping_entities_leave_no_clear_text():
+    content = "Contact: 75008 Paris jean@cabinet.fr"
+    entities = server.regex_service.extract_entities(content)
+    result = DocumentProcessor.apply_anonymization(content, [e.to_entity() for e in entities])
+    assert result == "Contact: [Adresse Anonymisée]"
+
+
+def test_contained_entity_is_absorbed():
+    content = "0123456789"
+    entities = [entity(2, 8, "[A]"), entity(4, 6, "[B]")]
+    assert DocumentProcessor.apply_anonymization(content, entities) == "01[A]89"
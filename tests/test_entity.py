@@ -0,0 +1,61 @@
+import pytest
+from pydantic import ValidationError
+
+from server import Entity, EntitySource, EntityType, RawEntity
+
+FIELDS = {
+    "text": "06.12.34.56.78",
+    "type": "phone",
+    "source": "REGEX",
+    "confidence": 1.0,
+    "replacement": "06 XX XX XX XX",
+}
+
+
+def test_positions_is_serialized_from_start_end():
+    entity = Entity(**FIELDS, start=3, end=17)
+    data = entity.model_dump()
+    assert (data["start"], data["end"]) == (3, 17)
+    assert data["positions"] == [{"start": 3, "end": 17}]
+
+
+def test_round_trip_through_json():
+    entity = Entity(**FIELDS, start=3, end=17)
+    assert Entity.model_validate_json(entity.model_dump_json()) == entity
+
+
+def test_legacy_positions_payload():
+    entity = Entity(**FIELDS, positions=[{"start": 3, "end": 17}])
+    assert (entity.start, entity.end) == (3, 17)
+    assert entity.positions[0].start == 3
+
+
+def test_raw_entity_conversion():
+    raw = RawEntity(
+        text="RG 24/12345",
+        type=EntityType.LEGAL,
+        source=EntitySource.REGEX,
+        confidence=1.0,
+        replacement="[Référence Anonymisée]",
+        start=5,
+        end=16
+    )
+    entity = raw.to_entity()
+    assert entity.model_dump(exclude={"id"}) == {
+        "text": "RG 24/12345",
+        "type": EntityType.LEGAL,
+        "source": EntitySource.REGEX,
+        "confidence": 1.0,
+        "replacement": "[Référence Anonymisée]",
+        "start": 5,
+        "end": 16,
+        "selected": True,
+        "positions": [{"start": 5, "end": 16}],
+    }
+    assert entity.id != raw.to_entity().id
+
+
+@pytest.mark.parametrize("positions", [[], [{}], [{"start": 1}], [[1, 2]], "1-2", None])
+def test_malformed_legacy_positions_is_a_validation_error(positions):
+    with pytest.raises(ValidationError):
+        Entity(**FIELDS, positions=positions)
@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+import server
+
+
+def scalar_luhn(number):
+    """The original per-digit implementation of RegexService.luhn_check"""
+    def digits_of(n):
+        return [int(d) for d in str(n)]
+    digits = digits_of(number)
+    checksum = sum(digits[-1::-2])
+    for d in digits[-2::-2]:
+        checksum += sum(digits_of(d * 2))
+    return checksum % 10 == 0
+
+
+def test_luhn_mask_matches_scalar_implementation():
+    rng = random.Random(0)
+    numbers = ["".join(rng.choice("0123456789") for _ in range(14)) for _ in range(5000)]
+    mask = server.regex_service.luhn_mask(numbers)
+    assert mask.tolist() == [scalar_luhn(n) for n in numbers]
+    assert 0 < mask.sum() < len(numbers)
+
+
+@pytest.mark.parametrize("number", ["73282932000074", "12345678901234", "00000000000000"])
+def test_luhn_check_single_number(number):
+    assert server.regex_service.luhn_check(number) == scalar_luhn(number)
+
+
+def test_luhn_mask_non_ascii_digits():
+    # \d also matches other decimal scripts, here Arabic-Indic and fullwidth digits
+    arabic = "".join(chr(0x0660 + int(d)) for d in "73282932000074")
+    fullwidth = "".join(chr(0xFF10 + int(d)) for d in "12345678901234")
+    assert server.regex_service.luhn_mask([arabic, fullwidth]).tolist() == [True, False]
+
+
+def test_luhn_mask_empty():
+    assert server.regex_service.luhn_mask([]).tolist() == []
@@ -0,0 +1,105 @@
+import re
+
+import pytest
+import spacy
+
+from server import EntityType, NERService
+
+
+class StubNLP:
+    """Blank French pipeline whose pipe() tags known words as entities"""
+
+    def __init__(self, labels):
+        self.blank = spacy.blank("fr")
+        self.labels = labels
+        self.calls = []
+
+    def pipe(self, texts, batch_size=None):
+        texts = list(texts)
+        self.calls.append(texts)
+        for text in texts:
+            doc = self.blank(text)
+            doc.ents = [
+                doc.char_span(match.start(), match.end(), label=self.labels[match.group()])
+                for match in re.finditer("|".join(map(re.escape, self.labels)), text)
+            ]
+            yield doc
+
+
+@pytest.fixture
+def stub():
+    return StubNLP({"Dupont": "PER", "Martin": "PER", "Lefebvre": "PER", "Renault": "ORG"})
+
+
+@pytest.fixture
+def service(stub):
+    service = NERService()
+    service.nlp = stub
+    return service
+
+
+def spans(entities):
+    return [(e.type, e.text, e.start, e.end, e.replacement) for e in entities]
+
+
+def test_offsets_are_absolute_across_paragraphs(service):
+    text = "Monsieur Dupont.\n\n\n\nChez Renault, avec Martin."
+    entities = service.extract_entities(text)
+    assert spans(entities) == [
+        (EntityType.PERSON, "Dupont", 9, 15, "Personne A"),
+        (EntityType.ORGANIZATION, "Renault", 25, 32, "Organisation A"),
+        (EntityType.PERSON, "Martin", 39, 45, "Personne B"),
+    ]
+    assert all(text[e.start:e.end] == e.text for e in entities)
+
+
+def test_repeated_paragraph_is_served_from_cache(service, stub):
+    paragraph = "Maître Dupont plaide."
+    first = service.extract_entities(paragraph)
+    second = service.extract_entities("Préambule.\n\n" + paragraph)
+    assert stub.calls == [[paragraph], ["Préambule."]]
+    assert spans(first) == [(EntityType.PERSON, "Dupont", 7, 13, "Personne A")]
+    assert spans(second) == [(EntityType.PERSON, "Dupont", 19, 25, "Personne B")]
+
+
+def test_batch_runs_each_distinct_paragraph_once(service, stub):
+    sinks = [{}, {}]
+    service.fill_batch(sinks, ["Dupont\n\nRenault", "Renault\n\nDupont"])
+    assert stub.calls == [["Dupont", "Renault"]]
+    assert [[(e.text, e.start) for e in sink.values()] for sink in sinks] == [
+        [("Dupont", 0), ("Renault", 8)],
+        [("Renault", 0), ("Dupont", 9)],
+    ]
+
+
+def test_cache_evicts_least_recently_used(service, stub, monkeypatch):
+    monkeypatch.setattr(NERService, "cache_size", 2)
+    for paragraph in ["Dupont", "Martin", "Dupont", "Lefebvre"]:
+        service.extract_entities(paragraph)
+    assert len(service._cache) == 2
+    assert stub.calls == [["Dupont"], ["Martin"], ["Lefebvre"]]
+
+    # Martin was evicted, Dupont was refreshed by its second use
+    service.extract_entities("Dupont")
+    service.extract_entities("Martin")
+    assert stub.calls[3:] == [["Martin"]]
+
+
+def test_only_target_labels_are_kept_with_default_confidence(service, stub):
+    stub.labels["Paris"] = "LOC"
+    doc = next(stub.pipe(["Dupont de Renault, à Paris"]))
+    # ORG is a built-in symbol while PER is a string hash; both must be matched
+    assert doc.vocab.strings["ORG"] == spacy.symbols.ORG
+    assert doc.vocab.strings["PER"] == spacy.strings.hash_string("PER")
+    assert [ent.label_ for ent in doc.ents] == ["PER", "ORG", "LOC"]
+    assert service._spans_from_doc(doc) == (
+        ("PER", 0, 6, 0.9),
+        ("ORG", 10, 17, 0.85),
+    )
+
+
+@pytest.mark.parametrize("index, name", [
+    (1, "A"), (26, "Z"), (27, "AA"), (52, "AZ"), (53, "BA"), (702, "ZZ"), (703, "AAA"),
+])
+def test_idx_to_name(index, name):
+    assert NERService._idx_to_name(index) == name
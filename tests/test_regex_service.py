@@ -0,0 +1,122 @@
+import pytest
+
+import server
+from server import EntityType
+
+
+def spans(text):
+    """(type, text, start, end) of every regex entity, in document order"""
+    return sorted(
+        ((e.type, e.text, e.start, e.end) for e in server.regex_service.extract_entities(text)),
+        key=lambda span: (span[2], span[3])
+    )
+
+
+@pytest.mark.parametrize("text, expected", [
+    # The postal-code pattern runs on into the next token; the email must still be found
+    ("Contact: 75008 Paris jean@cabinet.fr", [
+        (EntityType.ADDRESS, "75008 Paris jean", 9, 25),
+        (EntityType.EMAIL, "jean@cabinet.fr", 21, 36),
+    ]),
+    # A phone-shaped local part belongs to the email, not to a phone number
+    ("0612345678@orange.fr", [
+        (EntityType.EMAIL, "0612345678@orange.fr", 0, 20),
+    ]),
+])
+def test_overlapping_patterns_keep_email(text, expected):
+    assert spans(text) == expected
+
+
+# Spans produced by the original per-pattern re.finditer implementation
+@pytest.mark.parametrize("text, expected", [
+    # Street number padded far beyond any fixed lookbehind window
+    ("12" + " " * 15 + "rue de la Paix", [(EntityType.ADDRESS, "12" + " " * 15 + "rue de la Paix", 0, 31)]),
+    ("12" + "\t" * 18 + "avenue Foch.", [(EntityType.ADDRESS, "12" + "\t" * 18 + "avenue Foch", 0, 31)]),
+    ("Au 123 rue de la Paix, Paris", [(EntityType.ADDRESS, "123 rue de la Paix", 3, 21)]),
+    ("5 AVENUE Foch", [(EntityType.ADDRESS, "5 AVENUE Foch", 0, 13)]),
+    ("12 rue A 34 rue B", [
+        (EntityType.ADDRESS, "12 rue A ", 0, 9),
+        (EntityType.ADDRESS, "34 rue B", 9, 17),
+    ]),
+    ("x12 rue A", []),
+    ("route de 12 chemin Vert", [(EntityType.ADDRESS, "12 chemin Vert", 9, 23)]),
+    ("8 allée des Lilas", [(EntityType.ADDRESS, "8 allée des Lilas", 0, 17)]),
+    ("RG 24/12345", [(EntityType.LEGAL, "RG 24/12345", 0, 11)]),
+    ("dossier n° 12-345 et Dossier N°12/3", [
+        (EntityType.LEGAL, "dossier n° 12-345", 0, 17),
+        (EntityType.LEGAL, "Dossier N°12/3", 21, 35),
+    ]),
+    ("article 1240, Article 700-1, ARTICLE 5", [
+        (EntityType.LEGAL, "article 1240", 0, 12),
+        (EntityType.LEGAL, "Article 700-1", 14, 27),
+        (EntityType.LEGAL, "ARTICLE 5", 29, 38),
+    ]),
+])
+def test_anchored_spans_match_baseline(text, expected):
+    assert spans(text) == expected
+
+
+ASCII_CORPUS = [
+    "Monsieur Jean DUPONT, au 123 rue de la Paix, 75001 Paris, joignable au 06.12.34.56.78 "
+    "ou +33612345678, email jean.dupont@cabinet-martin.fr. SIRET 73282932000074, "
+    "et pas 12345678901234. SSN 1850799123456. Le dossier RG 24/12345, article 700-1.",
+    "Tel: 01 23 45 67 89\tFax: 01-23-45-67-89\nSiege: 13008 Marseille",
+    "contact@exemple.com, 0612345678@orange.fr, 75008 Paris jean@cabinet.fr",
+    # Unicode \s matches the ASCII separators \x1c-\x1f, re.ASCII \s does not
+    "Tel 06\x1f12\x1f34\x1f56\x1f78, 75008\x1cParis",
+]
+
+
+@pytest.mark.parametrize("text", ASCII_CORPUS)
+def test_ascii_and_unicode_patterns_agree_on_ascii_text(text):
+    assert text.isascii()
+    unicode_patterns = [compiled for compiled, _ in server.regex_service._compiled]
+    for compiled, chosen in zip(unicode_patterns, server.regex_service._alternations(text)):
+        unicode_spans = [(m.lastgroup, m.span()) for m in compiled.finditer(text)]
+        chosen_spans = [(m.lastgroup, m.span()) for m in chosen.finditer(text)]
+        assert unicode_spans == chosen_spans
+
+
+def test_control_separators_do_not_depend_on_other_characters():
+    text = "Tel 06\x1f12\x1f34\x1f56\x1f78"
+    assert spans(text) == [(EntityType.PHONE, "06\x1f12\x1f34\x1f56\x1f78", 4, 18)]
+    assert spans(text + " é") == spans(text)
+
+
+def test_ascii_corpus_spans():
+    assert spans(ASCII_CORPUS[0]) == [
+        (EntityType.ADDRESS, "123 rue de la Paix", 25, 43),
+        (EntityType.ADDRESS, "75001 Paris", 45, 56),
+        (EntityType.PHONE, "06.12.34.56.78", 71, 85),
+        (EntityType.PHONE, "+33612345678", 89, 101),
+        (EntityType.EMAIL, "jean.dupont@cabinet-martin.fr", 109, 138),
+        (EntityType.SIRET, "73282932000074", 146, 160),
+        (EntityType.SSN, "1850799123456", 189, 202),
+        (EntityType.LEGAL, "RG 24/12345", 215, 226),
+        (EntityType.LEGAL, "article 700-1", 228, 241),
+    ]
+
+
+def test_unicode_text_spans():
+    # Non-ASCII text goes through the Unicode patterns
+    text = "Tél. 06.12.34.56.78 – Me Hélène Martin, martin@exemple.fr, domiciliée 8 allée des Lilas"
+    assert not text.isascii()
+    assert spans(text) == [
+        (EntityType.PHONE, "06.12.34.56.78", 5, 19),
+        (EntityType.EMAIL, "martin@exemple.fr", 40, 57),
+        (EntityType.ADDRESS, "8 allée des Lilas", 70, 87),
+    ]
+
+
+@pytest.mark.parametrize("text", [
+    # Only lowercase, capitalized and uppercase keyword spellings are recognised
+    "5 RuE Foch",
+    # The city after a postal code must start with a capital letter
+    "75001 paris",
+    # RG must be uppercase
+    "rg 24/12345",
+    # The email TLD class no longer accepts a literal |
+    "a@b.c|m",
+])
+def test_documented_casing_changes(text):
+    assert spans(text) == []